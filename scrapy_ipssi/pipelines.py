@@ -10,15 +10,20 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+# Connexion à MongoDB à partir des variables d'environnement (.env)
+def creer_client_mongodb(**options):
+    mongo_user = os.getenv("MONGODB_USERNAME", "root")
+    mongo_password = os.getenv("MONGODB_PASSWORD", "password") 
+    mongo_host = os.getenv("MONGODB_URL", "localhost:27017")
+    
+    connection_string = f"mongodb://{mongo_user}:{mongo_password}@{mongo_host}/"
+    return pymongo.MongoClient(connection_string, **options)
+
 class ScrapyIpssiPipeline:
     def __init__(self):
-        mongo_user = os.getenv("MONGODB_USERNAME", "root")
-        mongo_password = os.getenv("MONGODB_PASSWORD", "password") 
-        mongo_host = os.getenv("MONGODB_URL", "localhost:27017")
         mongo_db = os.getenv("MONGODB_DATABASE", "kbo")
         
-        connection_string = f"mongodb://{mongo_user}:{mongo_password}@{mongo_host}/"
-        self.client = pymongo.MongoClient(connection_string)
+        self.client = creer_client_mongodb()
         self.db = self.client[mongo_db]
         self.collection = self.db["entreprises"]
 
@@ -0,0 +1,175 @@
+# Banc de charge : lance le spider kbo et ses pipelines contre le serveur simulé
+#
+# Mesure le débit de bout en bout (items/s) pour régler les settings
+# (CONCURRENT_REQUESTS, DOWNLOAD_DELAY, AUTOTHROTTLE_*, RETRY_*...) et comparer
+# les versions, sans toucher au vrai registre.
+#
+# Exemple :
+#   python -m scrapy_ipssi.simulation.load_test --nombre 500 --latence 0.2 \
+#       --taux-rafale 0.01 -s CONCURRENT_REQUESTS=32 --rapport rapport.json
+
+import argparse
+import csv
+import json
+import sys
+import tempfile
+from pathlib import Path
+
+import pymongo
+from scrapy.crawler import CrawlerProcess
+from scrapy.utils.project import get_project_settings
+
+from scrapy_ipssi.pipelines import creer_client_mongodb
+from scrapy_ipssi.simulation.mock_server import (
+    ajouter_arguments,
+    charger_entreprises,
+    demarrer_dans_un_process,
+    formater_numero,
+    lire_compteurs,
+)
+
+
+# Numéros à crawler : ceux des entreprises modèles, complétés par des numéros fictifs
+def choisir_numeros(entreprises, nombre):
+    numeros = list(entreprises)[:nombre]
+    suivant = 999000000
+    while len(numeros) < nombre:
+        numero = formater_numero(str(suivant))
+        if numero not in entreprises:
+            numeros.append(numero)
+        suivant += 1
+    return numeros
+
+
+def ecrire_csv(numeros, dossier):
+    chemin = Path(dossier) / "enterprise.csv"
+    with open(chemin, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=["EnterpriseNumber"])
+        writer.writeheader()
+        for numero in numeros:
+            writer.writerow({"EnterpriseNumber": numero})
+    return chemin
+
+
+# Lecture des -s CLE=VALEUR, comme pour scrapy crawl
+def lire_settings(valeurs):
+    settings = {}
+    for valeur in valeurs:
+        cle, separateur, contenu = valeur.partition('=')
+        if not separateur:
+            raise ValueError(f"Setting invalide (attendu CLE=VALEUR) : {valeur}")
+        settings[cle] = contenu
+    return settings
+
+
+# Sans MongoDB, chaque item bloquerait le reactor ~30 s (délai de sélection du serveur de pymongo)
+def verifier_mongodb():
+    client = creer_client_mongodb(serverSelectionTimeoutMS=2000)
+    try:
+        client.admin.command('ping')
+    finally:
+        client.close()
+
+
+def construire_rapport(stats, compteurs_serveur, nombre):
+    debut = stats.get('start_time')
+    fin = stats.get('finish_time')
+    duree = (fin - debut).total_seconds() if debut and fin else stats.get('elapsed_time_seconds', 0)
+    items = stats.get('item_scraped_count', 0)
+    return {
+        'entreprises_demandees': nombre,
+        'items': items,
+        'complet': items >= nombre,
+        'duree_secondes': round(duree, 3),
+        'items_par_seconde': round(items / duree, 2) if duree else 0.0,
+        'requetes_envoyees': stats.get('downloader/request_count', 0),
+        'reponses_par_statut': {
+            cle.rsplit('/', 1)[-1]: valeur
+            for cle, valeur in stats.items()
+            if cle.startswith('downloader/response_status_count/')
+        },
+        'retries': stats.get('retry/count', 0),
+        'retries_abandonnes': stats.get('retry/max_reached', 0),
+        'erreurs_log': stats.get('log_count/ERROR', 0),
+        'serveur': compteurs_serveur,
+        'raison_fin': stats.get('finish_reason'),
+    }
+
+
+def afficher_rapport(rapport):
+    print()
+    print("=== Banc de charge kbo ===")
+    print(f"Items          : {rapport['items']} / {rapport['entreprises_demandees']}")
+    print(f"Durée          : {rapport['duree_secondes']} s")
+    print(f"Débit          : {rapport['items_par_seconde']} items/s")
+    print(f"Requêtes       : {rapport['requetes_envoyees']} (retries : {rapport['retries']}, abandonnés : {rapport['retries_abandonnes']})")
+    print(f"Statuts reçus  : {rapport['reponses_par_statut']}")
+    print(f"Côté serveur   : {rapport['serveur']}")
+    print(f"Erreurs (log)  : {rapport['erreurs_log']}")
+    manquants = '' if rapport['complet'] else f" (INCOMPLET : {rapport['entreprises_demandees'] - rapport['items']} items manquants)"
+    print(f"Fin            : {rapport['raison_fin']}{manquants}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Banc de charge du spider kbo contre le serveur simulé")
+    parser.add_argument('--nombre', type=int, default=100, help="Nombre d'entreprises à crawler")
+    parser.add_argument('--port', type=int, default=0, help="Port du serveur simulé (0 = libre)")
+    parser.add_argument('-s', '--set', dest='settings', action='append', default=[], metavar='CLE=VALEUR',
+                        help="Surcharge d'un setting Scrapy (répétable)")
+    parser.add_argument('--sans-pipeline', action='store_true',
+                        help="Désactive ITEM_PIPELINES (mesure du crawl seul, sans MongoDB)")
+    parser.add_argument('--rapport', help="Écrit le rapport JSON dans ce fichier")
+    ajouter_arguments(parser)
+    args = parser.parse_args()
+
+    try:
+        surcharges = lire_settings(args.settings)
+    except ValueError as erreur:
+        parser.error(str(erreur))
+
+    settings = get_project_settings()
+    for cle, valeur in surcharges.items():
+        settings.set(cle, valeur, priority='cmdline')
+    if args.sans_pipeline:
+        settings.set('ITEM_PIPELINES', {}, priority='cmdline')
+    elif settings.getdict('ITEM_PIPELINES'):
+        try:
+            verifier_mongodb()
+        except pymongo.errors.PyMongoError as erreur:
+            parser.error(f"MongoDB injoignable ({erreur.__class__.__name__}) : "
+                         "lancer docker compose up -d, ou utiliser --sans-pipeline")
+
+    # Le serveur tourne dans son propre process : son coût CPU n'entre pas dans la mesure
+    try:
+        serveur, url = demarrer_dans_un_process(args, port=args.port)
+    except RuntimeError as erreur:
+        parser.error(str(erreur))
+    try:
+        with tempfile.TemporaryDirectory() as dossier:
+            entreprises = charger_entreprises(args.entreprises)
+            csv_file = ecrire_csv(choisir_numeros(entreprises, args.nombre), dossier)
+
+            process = CrawlerProcess(settings)
+            crawler = process.create_crawler('kbo')
+            process.crawl(crawler, url=url, csv_file=str(csv_file), limite=args.nombre)
+            process.start()
+
+        compteurs_serveur = lire_compteurs(url)
+    finally:
+        serveur.terminate()
+        serveur.join()
+
+    rapport = construire_rapport(crawler.stats.get_stats(), compteurs_serveur, args.nombre)
+    afficher_rapport(rapport)
+    if args.rapport:
+        with open(args.rapport, "w", encoding="utf-8") as f:
+            json.dump(rapport, f, ensure_ascii=False, indent=2)
+
+    # Un spider qui n'envoie rien donnerait un rapport "finished" trompeur
+    if rapport['requetes_envoyees'] == 0:
+        sys.exit("Le spider kbo n'a envoyé aucune requête : vérifier la version de Scrapy "
+                 "et KboSpider.start() / start_requests()")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,444 @@
+# Serveur local qui imite kbopub.economie.fgov.be
+#
+# Sert la page toonondernemingps.html pour n'importe quel ondernemingsnummer,
+# à partir de pages sauvegardées, des entreprises déjà extraites
+# (entreprise.json) ou de données générées. Permet d'injecter de la latence,
+# des erreurs 500 et des rafales de 429 pour tester le spider sans toucher au
+# vrai registre.
+#
+# Une rafale de 429 dure --duree-rafale secondes : toute requête reçue pendant
+# ce temps est refusée, donc un client plus lent (DOWNLOAD_DELAY, AUTOTHROTTLE)
+# en subit moins. Elle se déclenche au hasard (--taux-rafale) ou quand le client
+# dépasse --debit-max requêtes sur la dernière seconde.
+#
+# Lancement : python -m scrapy_ipssi.simulation.mock_server --port 8765
+
+import argparse
+import html
+import json
+import multiprocessing
+import queue
+import random
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urljoin, urlparse
+from urllib.request import urlopen
+
+CHEMIN_PAGE = "/kbopub/toonondernemingps.html"
+CHEMIN_STATS = "/simulation/stats"
+ENTREPRISES_JSON = Path(__file__).resolve().parents[2] / "entreprise.json"
+PAS_DE_DONNEES = "Pas de données reprises dans la BCE."
+
+
+# Formatage d'un numéro "0200420410" en "0200.420.410"
+def formater_numero(numero):
+    chiffres = numero.replace('.', '').strip().zfill(10)
+    return f"{chiffres[:4]}.{chiffres[4:7]}.{chiffres[7:]}"
+
+
+# Chargement des entreprises déjà extraites, indexées par numéro
+def charger_entreprises(chemin=ENTREPRISES_JSON):
+    entreprises = {}
+    if not chemin or not Path(chemin).exists():
+        return entreprises
+
+    # Le fichier peut contenir plusieurs listes JSON à la suite (un export par crawl)
+    contenu = Path(chemin).read_text(encoding="utf-8")
+    decodeur = json.JSONDecoder()
+    position = 0
+    while position < len(contenu):
+        while position < len(contenu) and contenu[position].isspace():
+            position += 1
+        if position >= len(contenu):
+            break
+        bloc, position = decodeur.raw_decode(contenu, position)
+        for entreprise in bloc if isinstance(bloc, list) else [bloc]:
+            if entreprise.get('numero'):
+                entreprises[formater_numero(entreprise['numero'])] = entreprise
+    return entreprises
+
+
+# Génération d'une entreprise fictive mais stable pour un numéro inconnu
+def generer_entreprise(numero):
+    rng = random.Random(numero)
+    chiffres = numero.replace('.', '')
+    return {
+        'numero': numero,
+        'generalites': {
+            'numero': numero,
+            'statut': 'Actif',
+            'situation_juridique': 'Situation normale',
+            'date_debut': f"{rng.randint(1, 28)} janvier {rng.randint(1950, 2024)}",
+            'denomination': f"Entreprise simulée {numero}",
+            'adresse': f"Rue de la Loi {rng.randint(1, 200)} 1000 Bruxelles",
+            'forme_legale': 'Société à responsabilité limitée',
+        },
+        'fonctions': [
+            {'titre': 'Administrateur', 'nom': f"Nom{i} ,   Prénom{i}", 'date_debut': '1 janvier 2020'}
+            for i in range(rng.randint(0, 3))
+        ],
+        'capacites': [{'type': PAS_DE_DONNEES}],
+        'qualites': [{'description': 'Employeur ONSS', 'date_debut': '1 janvier 2020'}],
+        'autorisations': [{'description': PAS_DE_DONNEES}],
+        'nace_codes': {
+            '2025': [{'code': '62.100', 'description': 'Programmation informatique', 'date_debut': '1 janvier 2025'}],
+            '2008': [{'code': '62.010', 'description': 'Programmation informatique', 'date_debut': '1 janvier 2008'}],
+            '2003': [],
+        },
+        'donnees_financieres': {
+            'capital': f"{rng.randint(0, 100000)},00",
+            'assemblee_generale': 'juin',
+            'fin_annee_comptable': '31 décembre',
+        },
+        'liens_entites': [{'description': PAS_DE_DONNEES}],
+        'liens_externes': [
+            {
+                'description': 'Publications des comptes annuels à la BNB',
+                'url': f"https://consult.cbso.nbb.be/consult-enterprise/{chiffres}",
+            }
+        ],
+    }
+
+
+# Construction d'une page HTML avec la même structure que la page du registre
+def generer_page(entreprise):
+    e = lambda valeur: html.escape(str(valeur or ''), quote=True)
+    g = entreprise.get('generalites', {})
+    f = entreprise.get('donnees_financieres', {})
+    lignes = []
+
+    def titre(texte):
+        lignes.append(f'<tr><td colspan="3"><h2>{e(texte)}</h2></td></tr>')
+
+    def depuis(date):
+        return f'<span class="upd">Depuis le {e(date)}</span>' if date else ''
+
+    # Généralités
+    titre("Généralités")
+    lignes.append(f'<tr><td class="QL">Numéro d\'entreprise:</td><td class="QL">{e(g.get("numero"))}</td></tr>')
+    lignes.append(f'<tr><td class="QL">Statut:</td><td class="QL"><strong><span class="pageactief">{e(g.get("statut"))}</span></strong></td></tr>')
+    lignes.append(f'<tr><td class="QL">Situation juridique:</td><td class="QL"><strong><span class="pageactief">{e(g.get("situation_juridique"))}</span></strong></td></tr>')
+    lignes.append(f'<tr><td class="QL">Date de début:</td><td class="QL">{e(g.get("date_debut"))}</td></tr>')
+    lignes.append(f'<tr><td class="QL">Dénomination:</td><td class="QL">{e(g.get("denomination"))}<br/><span class="upd">Dénomination en français</span></td></tr>')
+    lignes.append(f'<tr><td class="QL">Adresse du siège:</td><td class="QL">{e(g.get("adresse"))}<br/></td></tr>')
+    lignes.append(f'<tr><td class="QL">Forme légale:</td><td class="QL">{e(g.get("forme_legale"))}<br/></td></tr>')
+    lignes.append('</table>')
+
+    # Fonctions
+    lignes.append('<table id="toonfctie">')
+    for fonction in entreprise.get('fonctions', []):
+        lignes.append(
+            f'<tr><td>{e(fonction.get("titre"))}</td><td>{e(fonction.get("nom"))}</td>'
+            f'<td>{depuis(fonction.get("date_debut"))}</td></tr>'
+        )
+    lignes.append('</table>')
+
+    lignes.append('<table>')
+
+    # Capacités entrepreneuriales
+    titre("Capacités entrepreneuriales")
+    for capacite in entreprise.get('capacites', []) or [{'type': PAS_DE_DONNEES}]:
+        lignes.append(
+            f'<tr><td>{e(capacite.get("type"))}</td><td>{e(capacite.get("valeur"))}</td>'
+            f'<td>{depuis(capacite.get("date_debut"))}</td></tr>'
+        )
+
+    # Qualités
+    titre("Qualités")
+    for qualite in entreprise.get('qualites', []) or [{'description': PAS_DE_DONNEES}]:
+        lignes.append(f'<tr><td colspan="3">{e(qualite.get("description"))} {depuis(qualite.get("date_debut"))}</td></tr>')
+
+    # Autorisations
+    titre("Autorisations")
+    for autorisation in entreprise.get('autorisations', []) or [{'description': PAS_DE_DONNEES}]:
+        if autorisation.get('url'):
+            lignes.append(f'<tr><td colspan="3"><a href="{e(autorisation["url"])}">{e(autorisation.get("description"))}</a></td></tr>')
+        else:
+            lignes.append(f'<tr><td colspan="3">{e(autorisation.get("description"))}</td></tr>')
+
+    # Codes NACE 2025
+    titre("Activités TVA Code Nacebel version 2025")
+    for code in entreprise.get('nace_codes', {}).get('2025', []):
+        lignes.append(
+            f'<tr><td colspan="3">TVA 2025 <a href="#">{e(code.get("code"))}</a> - '
+            f'{e(code.get("description"))} {depuis(code.get("date_debut"))}\n</td></tr>'
+        )
+    lignes.append('</table>')
+
+    # Codes NACE 2008
+    lignes.append('<table id="toonbtw2008">')
+    for code in entreprise.get('nace_codes', {}).get('2008', []):
+        lignes.append(
+            f'<tr><td>TVA 2008 {e(code.get("code"))}</td><td>{e(code.get("description"))}</td>'
+            f'<td>{depuis(code.get("date_debut"))}</td></tr>'
+        )
+    lignes.append('</table>')
+
+    # Codes NACE 2003
+    lignes.append('<table id="toonbtw">')
+    for code in entreprise.get('nace_codes', {}).get('2003', []):
+        lignes.append(
+            f'<tr><td colspan="3">TVA2003 {e(code.get("code"))} - {e(code.get("description"))} '
+            f'{depuis(code.get("date_debut"))}</td></tr>'
+        )
+    lignes.append('</table>')
+
+    lignes.append('<table>')
+
+    # Données financières
+    titre("Données financières")
+    lignes.append(f'<tr><td class="QL">Capital</td><td class="QL">{e(f.get("capital"))}</td></tr>')
+    lignes.append(f'<tr><td class="QL">Assemblée générale</td><td class="QL">{e(f.get("assemblee_generale"))}</td></tr>')
+    lignes.append(f'<tr><td class="QL">Date de fin de l\'année comptable</td><td class="QL">{e(f.get("fin_annee_comptable"))}</td></tr>')
+
+    # Liens entre entités
+    # Sur la vraie page, le spider déborde sur la ligne des liens externes et en
+    # tire une entrée supplémentaire (numéro = premier lien externe) : on ne la
+    # rend pas comme une entité, c'est la ligne des liens externes qui la recrée.
+    entites = entreprise.get('liens_entites', [])
+    externes = entreprise.get('liens_externes', [])
+    if entites and externes and entites[-1].get('numero') == externes[0].get('description'):
+        entites = entites[:-1]
+    elif not entites:
+        entites = [{'description': PAS_DE_DONNEES}]
+
+    titre("Liens entre entités")
+    for lien in entites:
+        if lien.get('numero'):
+            # Nom, relation et date sont lus par position de nœud texte : on ne rend que ceux présents
+            morceaux = [lien.get('nom'), lien.get('relation'), "depuis le " + lien['date'] if lien.get('date') else None]
+            while morceaux and morceaux[-1] is None:
+                morceaux.pop()
+            textes = '<br/>'.join(f'\n{e(morceau)}\n' for morceau in morceaux)
+            lignes.append(
+                f'<tr><td colspan="3"><a href="toonondernemingps.html?ondernemingsnummer={e(lien["numero"].replace(".", ""))}">'
+                f'{e(lien["numero"])}</a>{textes}</td></tr>'
+            )
+        else:
+            lignes.append(f'<tr><td colspan="3">{e(lien.get("description"))}</td></tr>')
+
+    # Liens externes
+    titre("Liens externes")
+    liens = '<br/>'.join(
+        f'\n<a href="{e(lien.get("url"))}">{e(lien.get("description"))}</a>\n'
+        for lien in externes
+    )
+    lignes.append(f'<tr><td colspan="3">{liens}</td></tr>')
+
+    corps = '\n'.join(lignes)
+    return (
+        '<!DOCTYPE html>\n<html lang="fr"><head><meta charset="utf-8">'
+        f'<title>Banque-Carrefour des Entreprises</title></head><body>\n<table>\n{corps}\n</table>\n</body></html>'
+    )
+
+
+class Simulation:
+    # Paramètres de charge et compteurs partagés entre les threads du serveur
+    def __init__(self, pages=None, entreprises=None, latence=0.0, gigue=0.0,
+                 taux_erreur=0.0, taux_rafale=0.0, duree_rafale=None, debit_max=0, retry_after=1,
+                 graine=None, horloge=time.monotonic):
+        self.pages = Path(pages) if pages else None
+        self.entreprises = entreprises if entreprises is not None else charger_entreprises()
+        self.latence = latence
+        self.gigue = gigue
+        self.taux_erreur = taux_erreur
+        self.taux_rafale = taux_rafale
+        self.duree_rafale = retry_after if duree_rafale is None else duree_rafale
+        self.debit_max = debit_max
+        self.retry_after = retry_after
+        self.rng = random.Random(graine)
+        self.horloge = horloge
+        self.verrou = threading.Lock()
+        self.fin_rafale = 0.0
+        self.arrivees = deque()
+        self.compteurs = {'requetes': 0, '200': 0, '404': 0, '429': 0, '500': 0}
+
+    def compter(self, cle):
+        with self.verrou:
+            self.compteurs[cle] = self.compteurs.get(cle, 0) + 1
+
+    # Tirage du code de réponse : une rafale de 429 en cours passe avant tout
+    def tirer_statut(self):
+        maintenant = self.horloge()
+        with self.verrou:
+            # Fenêtre glissante d'une seconde pour mesurer le débit du client
+            self.arrivees.append(maintenant)
+            while self.arrivees[0] <= maintenant - 1.0:
+                self.arrivees.popleft()
+
+            if maintenant < self.fin_rafale:
+                return 429
+            if self.debit_max and len(self.arrivees) > self.debit_max:
+                self.fin_rafale = maintenant + self.duree_rafale
+                return 429
+            if self.taux_rafale and self.rng.random() < self.taux_rafale:
+                self.fin_rafale = maintenant + self.duree_rafale
+                return 429
+            if self.taux_erreur and self.rng.random() < self.taux_erreur:
+                return 500
+        return 200
+
+    def tirer_latence(self):
+        with self.verrou:
+            delai = self.latence + self.rng.uniform(-self.gigue, self.gigue)
+        return max(delai, 0.0)
+
+    # Recherche de la page : corpus sauvegardé, puis entreprise.json, puis données générées
+    def page_pour(self, numero):
+        if self.pages:
+            for nom in (numero.replace('.', ''), numero):
+                chemin = self.pages / f"{nom}.html"
+                if chemin.exists():
+                    return chemin.read_bytes()
+        entreprise = self.entreprises.get(numero) or generer_entreprise(numero)
+        return generer_page(entreprise).encode("utf-8")
+
+
+class KboHandler(BaseHTTPRequestHandler):
+    simulation = None
+
+    def do_GET(self):
+        simulation = self.simulation
+        url = urlparse(self.path)
+
+        # Compteurs du serveur, lus par le banc de charge (hors statistiques de charge)
+        if url.path == CHEMIN_STATS:
+            with simulation.verrou:
+                corps = json.dumps(simulation.compteurs).encode("utf-8")
+            return self.envoyer(200, corps, {'Content-Type': 'application/json'})
+
+        simulation.compter('requetes')
+        numero = parse_qs(url.query).get('ondernemingsnummer', [''])[0]
+
+        time.sleep(simulation.tirer_latence())
+
+        if url.path != CHEMIN_PAGE or not numero.replace('.', '').isdigit():
+            return self.repondre(404, b"Page introuvable")
+
+        statut = simulation.tirer_statut()
+        if statut == 429:
+            return self.repondre(429, b"Too Many Requests", {'Retry-After': str(simulation.retry_after)})
+        if statut == 500:
+            return self.repondre(500, b"Erreur interne simulee")
+
+        self.repondre(200, simulation.page_pour(formater_numero(numero)))
+
+    def repondre(self, statut, corps, entetes=None):
+        self.simulation.compter(str(statut))
+        self.envoyer(statut, corps, entetes)
+
+    def envoyer(self, statut, corps, entetes=None):
+        entetes = {'Content-Type': 'text/html; charset=utf-8', **(entetes or {})}
+        self.send_response(statut)
+        self.send_header('Content-Length', str(len(corps)))
+        for nom, valeur in entetes.items():
+            self.send_header(nom, valeur)
+        self.end_headers()
+        self.wfile.write(corps)
+
+    # Pas de log par requête, trop bruyant sous charge
+    def log_message(self, format, *args):
+        pass
+
+
+# Création du serveur (port 0 = port libre choisi par le système)
+def creer_serveur(simulation, hote="127.0.0.1", port=0):
+    handler = type('KboHandler', (KboHandler,), {'simulation': simulation})
+    serveur = ThreadingHTTPServer((hote, port), handler)
+    serveur.daemon_threads = True
+    return serveur
+
+
+def url_de_base(serveur):
+    hote, port = serveur.server_address[:2]
+    return f"http://{hote}:{port}{CHEMIN_PAGE}?lang=fr"
+
+
+# Point d'entrée du process enfant : renvoie l'URL au parent puis sert indéfiniment
+def servir(args, hote, port, file_url):
+    serveur = creer_serveur(simulation_depuis_arguments(args), hote, port)
+    file_url.put(url_de_base(serveur))
+    serveur.serve_forever()
+
+
+# Démarrage du serveur dans un process séparé, pour ne pas partager le GIL avec Scrapy
+def demarrer_dans_un_process(args, hote="127.0.0.1", port=0):
+    file_url = multiprocessing.Queue()
+    process = multiprocessing.Process(target=servir, args=(args, hote, port, file_url), daemon=True)
+    process.start()
+
+    # Attente par petits pas : si l'enfant meurt au démarrage (port pris, --pages invalide),
+    # on le voit tout de suite, sa trace étant déjà affichée sur stderr
+    limite = time.monotonic() + 30
+    while True:
+        try:
+            return process, file_url.get(timeout=0.1)
+        except queue.Empty:
+            if not process.is_alive():
+                process.join()
+                raise RuntimeError(f"Le serveur simulé s'est arrêté au démarrage (code de sortie {process.exitcode})")
+            if time.monotonic() > limite:
+                process.terminate()
+                process.join()
+                raise RuntimeError("Le serveur simulé n'a pas démarré en 30 s")
+
+
+def lire_compteurs(url):
+    with urlopen(urljoin(url, CHEMIN_STATS), timeout=10) as reponse:
+        return json.loads(reponse.read())
+
+
+def ajouter_arguments(parser):
+    parser.add_argument('--pages', help="Dossier de pages sauvegardées (<numero>.html)")
+    parser.add_argument('--entreprises', default=str(ENTREPRISES_JSON), help="Fichier JSON servant de modèle")
+    parser.add_argument('--latence', type=float, default=0.0, help="Latence moyenne en secondes")
+    parser.add_argument('--gigue', type=float, default=0.0, help="Variation de latence (+/-) en secondes")
+    parser.add_argument('--taux-erreur', type=float, default=0.0, help="Probabilité d'une erreur 500")
+    parser.add_argument('--taux-rafale', type=float, default=0.0, help="Probabilité de déclencher une rafale de 429")
+    parser.add_argument('--duree-rafale', type=float, default=None,
+                        help="Durée d'une rafale de 429 en secondes (par défaut : --retry-after)")
+    parser.add_argument('--debit-max', type=int, default=0,
+                        help="Déclenche une rafale au-delà de N requêtes par seconde (0 = désactivé)")
+    parser.add_argument('--retry-after', type=int, default=1, help="Valeur de l'en-tête Retry-After des 429")
+    parser.add_argument('--graine', type=int, default=None, help="Graine aléatoire pour rejouer un scénario")
+
+
+def simulation_depuis_arguments(args):
+    return Simulation(
+        pages=args.pages,
+        entreprises=charger_entreprises(args.entreprises),
+        latence=args.latence,
+        gigue=args.gigue,
+        taux_erreur=args.taux_erreur,
+        taux_rafale=args.taux_rafale,
+        duree_rafale=args.duree_rafale,
+        debit_max=args.debit_max,
+        retry_after=args.retry_after,
+        graine=args.graine,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serveur local imitant kbopub")
+    parser.add_argument('--hote', default="127.0.0.1")
+    parser.add_argument('--port', type=int, default=8765)
+    ajouter_arguments(parser)
+    args = parser.parse_args()
+
+    simulation = simulation_depuis_arguments(args)
+    serveur = creer_serveur(simulation, args.hote, args.port)
+    print(f"Serveur KBO simulé sur {url_de_base(serveur)} ({len(simulation.entreprises)} entreprises modèles)")
+    try:
+        serveur.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        serveur.server_close()
+        print(f"Compteurs : {simulation.compteurs}")
+
+
+if __name__ == '__main__':
+    main()
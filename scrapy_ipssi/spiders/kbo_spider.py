@@ -8,17 +8,21 @@ import os
 class KboSpider(scrapy.Spider):
     name = "kbo"
     url = "https://kbopub.economie.fgov.be/kbopub/toonondernemingps.html?lang=fr"
+    # Surchargeables avec -a (ex: -a url=... -a csv_file=... -a limite=100)
+    csv_file = None
+    limite = 10
     
     # Définition de la fonction qui va lancer les requêtes
     def start_requests(self):
-        csv_file = Path(__file__).parent / "enterprise.csv"
+        csv_file = Path(self.csv_file) if self.csv_file else Path(__file__).parent / "enterprise.csv"
+        limite = int(self.limite)
         with open(csv_file, "r") as f:
             reader = csv.DictReader(f)
-            # Limite pour récupérer les 10 premières entreprises, pour éviter le ban
+            # Limite pour récupérer les 10 premières entreprises par défaut, pour éviter le ban
             i = 0
             for row in reader:
                 # Si la limite est atteinte, on quitte la boucle
-                if i >= 10:
+                if i >= limite:
                     break
                 # Récupération du numéro d'entreprise
                 numero = row.get("EnterpriseNumber")
@@ -28,6 +32,11 @@ class KboSpider(scrapy.Spider):
                     yield scrapy.Request(url=full_url, callback=self.parse_page, meta={'numero': numero})
                     i += 1
     
+    # Scrapy >= 2.13 démarre le spider avec start() au lieu de start_requests()
+    async def start(self):
+        for request in self.start_requests():
+            yield request
+    
     # Fonction qui va parser chaque page
     def parse_page(self, response):
         entreprise = {
@@ -0,0 +1,67 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+# load_test importe Scrapy au niveau du module
+pytest.importorskip("scrapy")
+
+from scrapy_ipssi.simulation.load_test import choisir_numeros, construire_rapport, lire_settings
+
+
+def test_lire_settings():
+    assert lire_settings(["CONCURRENT_REQUESTS=32", "USER_AGENT=a=b"]) == {
+        'CONCURRENT_REQUESTS': "32",
+        'USER_AGENT': "a=b",
+    }
+
+
+def test_lire_settings_sans_egal():
+    with pytest.raises(ValueError):
+        lire_settings(["CONCURRENT_REQUESTS"])
+
+
+def test_choisir_numeros_complete_sans_doublon():
+    # Le premier numéro fictif est déjà une entreprise modèle : il doit être sauté
+    entreprises = {'0200.420.410': {}, '0999.000.000': {}}
+    numeros = choisir_numeros(entreprises, 5)
+
+    assert numeros[:2] == ['0200.420.410', '0999.000.000']
+    assert numeros[2:] == ['0999.000.001', '0999.000.002', '0999.000.003']
+    assert len(set(numeros)) == len(numeros)
+
+
+def test_choisir_numeros_tronque():
+    assert choisir_numeros({'0200.420.410': {}, '0200.171.970': {}}, 1) == ['0200.420.410']
+
+
+def test_construire_rapport():
+    debut = datetime(2026, 1, 1, 12, 0, 0)
+    stats = {
+        'start_time': debut,
+        'finish_time': debut + timedelta(seconds=4),
+        'item_scraped_count': 18,
+        'downloader/request_count': 25,
+        'downloader/response_status_count/200': 18,
+        'downloader/response_status_count/429': 7,
+        'retry/count': 7,
+        'finish_reason': 'finished',
+    }
+    compteurs = {'requetes': 25, '200': 18, '429': 7}
+    rapport = construire_rapport(stats, compteurs, 20)
+
+    assert rapport['duree_secondes'] == 4.0
+    assert rapport['items_par_seconde'] == 4.5
+    assert rapport['complet'] is False
+    assert rapport['reponses_par_statut'] == {'200': 18, '429': 7}
+    assert rapport['requetes_envoyees'] == 25
+    assert rapport['retries'] == 7
+    assert rapport['serveur'] == compteurs
+
+    stats['item_scraped_count'] = 20
+    assert construire_rapport(stats, compteurs, 20)['complet'] is True
+
+
+def test_construire_rapport_sans_duree():
+    rapport = construire_rapport({}, {}, 10)
+    assert rapport['items_par_seconde'] == 0.0
+    assert rapport['requetes_envoyees'] == 0
@@ -0,0 +1,95 @@
+import json
+import threading
+import time
+from urllib.error import HTTPError
+from urllib.request import urlopen
+
+import pytest
+
+from scrapy_ipssi.simulation.mock_server import CHEMIN_STATS, Simulation, creer_serveur
+
+
+# Démarre le serveur dans un thread sur un port libre et renvoie son adresse
+@pytest.fixture
+def demarrer():
+    serveurs = []
+
+    def _demarrer(simulation):
+        serveur = creer_serveur(simulation, port=0)
+        threading.Thread(target=serveur.serve_forever, args=(0.05,), daemon=True).start()
+        serveurs.append(serveur)
+        hote, port = serveur.server_address[:2]
+        return f"http://{hote}:{port}"
+
+    yield _demarrer
+    for serveur in serveurs:
+        serveur.shutdown()
+        serveur.server_close()
+
+
+def get(url):
+    try:
+        with urlopen(url, timeout=10) as reponse:
+            return reponse.status, reponse.headers, reponse.read()
+    except HTTPError as erreur:
+        return erreur.code, erreur.headers, erreur.read()
+
+
+def page(base, numero):
+    return get(f"{base}/kbopub/toonondernemingps.html?lang=fr&ondernemingsnummer={numero}")
+
+
+def test_pages_sauvegardees(demarrer, tmp_path):
+    (tmp_path / "0123456789.html").write_bytes(b"<html>sans points</html>")
+    (tmp_path / "0123.456.790.html").write_bytes(b"<html>avec points</html>")
+    base = demarrer(Simulation(pages=tmp_path, entreprises={}))
+
+    assert page(base, "0123456789")[::2] == (200, b"<html>sans points</html>")
+    assert page(base, "0123456790")[::2] == (200, b"<html>avec points</html>")
+
+
+def test_page_generee_hors_corpus(demarrer, tmp_path):
+    base = demarrer(Simulation(pages=tmp_path, entreprises={}))
+    statut, _, corps = page(base, "0999000001")
+    assert statut == 200
+    assert "Entreprise simulée 0999.000.001" in corps.decode("utf-8")
+
+
+def test_404(demarrer):
+    base = demarrer(Simulation(entreprises={}))
+    assert page(base, "abc")[0] == 404
+    assert get(f"{base}/autre.html?ondernemingsnummer=0123456789")[0] == 404
+
+
+def test_429_avec_retry_after(demarrer):
+    base = demarrer(Simulation(entreprises={}, taux_rafale=1.0, retry_after=3))
+    statut, entetes, _ = page(base, "0123456789")
+    assert statut == 429
+    assert entetes['Retry-After'] == "3"
+
+
+def test_stats_non_comptees(demarrer):
+    base = demarrer(Simulation(entreprises={}))
+    page(base, "0123456789")
+    get(base + CHEMIN_STATS)
+
+    statut, _, corps = get(base + CHEMIN_STATS)
+    assert statut == 200
+    assert json.loads(corps) == {'requetes': 1, '200': 1, '404': 0, '429': 0, '500': 0}
+
+
+def test_latence_et_gigue():
+    simulation = Simulation(entreprises={}, latence=0.2, gigue=0.05, graine=1)
+    delais = [simulation.tirer_latence() for _ in range(500)]
+    assert all(0.15 <= delai <= 0.25 for delai in delais)
+
+    # Une gigue plus grande que la latence ne donne jamais de délai négatif
+    simulation = Simulation(entreprises={}, latence=0.01, gigue=0.5, graine=1)
+    assert min(simulation.tirer_latence() for _ in range(500)) == 0.0
+
+
+def test_latence_appliquee_par_le_serveur(demarrer):
+    base = demarrer(Simulation(entreprises={}, latence=0.2))
+    debut = time.monotonic()
+    assert page(base, "0123456789")[0] == 200
+    assert time.monotonic() - debut >= 0.2
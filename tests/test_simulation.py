@@ -0,0 +1,94 @@
+import pytest
+
+from scrapy_ipssi.simulation.mock_server import (
+    Simulation,
+    charger_entreprises,
+    generer_entreprise,
+    generer_page,
+)
+
+ENTREPRISES = charger_entreprises()
+
+
+# Passe la page générée dans le spider, comme si elle venait du registre
+# (seuls ces tests sont ignorés sans Scrapy, le reste n'utilise que la stdlib)
+def parser(entreprise):
+    pytest.importorskip("scrapy")
+    from scrapy.http import HtmlResponse, Request
+
+    from scrapy_ipssi.spiders.kbo_spider import KboSpider
+
+    url = "http://127.0.0.1/kbopub/toonondernemingps.html?lang=fr"
+    requete = Request(url, meta={'numero': entreprise['numero']})
+    reponse = HtmlResponse(url=url, body=generer_page(entreprise).encode("utf-8"), encoding="utf-8", request=requete)
+    return next(KboSpider().parse_page(reponse))
+
+
+# Horloge manuelle pour rejouer les rafales sans attendre
+class Horloge:
+    def __init__(self):
+        self.maintenant = 0.0
+
+    def __call__(self):
+        return self.maintenant
+
+
+def test_entreprises_chargees():
+    assert len(ENTREPRISES) == 10
+
+
+@pytest.mark.parametrize("numero", sorted(ENTREPRISES))
+def test_aller_retour_entreprise_json(numero):
+    assert parser(ENTREPRISES[numero]) == ENTREPRISES[numero]
+
+
+def test_aller_retour_entreprise_generee():
+    entreprise = generer_entreprise("0999.000.001")
+    assert parser(entreprise) == entreprise
+
+
+def test_tirer_statut_rejouable_avec_graine():
+    def tirages():
+        horloge = Horloge()
+        simulation = Simulation(entreprises={}, taux_erreur=0.2, taux_rafale=0.05, duree_rafale=0.5,
+                                graine=42, horloge=horloge)
+        statuts = []
+        for _ in range(200):
+            statuts.append(simulation.tirer_statut())
+            horloge.maintenant += 0.1
+        return statuts
+
+    statuts = tirages()
+    assert statuts == tirages()
+    assert {200, 429, 500} <= set(statuts)
+
+
+def test_rafale_dure_un_temps_fixe():
+    horloge = Horloge()
+    simulation = Simulation(entreprises={}, taux_rafale=1.0, duree_rafale=2, graine=1, horloge=horloge)
+    assert simulation.tirer_statut() == 429
+
+    # Toute requête pendant la rafale est refusée, quel que soit leur nombre
+    simulation.taux_rafale = 0.0
+    for instant in (0.5, 1.0, 1.9):
+        horloge.maintenant = instant
+        assert simulation.tirer_statut() == 429
+
+    horloge.maintenant = 2.0
+    assert simulation.tirer_statut() == 200
+
+
+def test_rafale_declenchee_par_le_debit():
+    horloge = Horloge()
+    simulation = Simulation(entreprises={}, debit_max=3, duree_rafale=1, horloge=horloge)
+    statuts = []
+    for _ in range(4):
+        statuts.append(simulation.tirer_statut())
+        horloge.maintenant += 0.1
+    assert statuts == [200, 200, 200, 429]
+
+    # Un client qui ralentit sous le seuil n'est plus refusé une fois la rafale finie
+    horloge.maintenant += 1.0
+    for _ in range(5):
+        horloge.maintenant += 0.5
+        assert simulation.tirer_statut() == 200